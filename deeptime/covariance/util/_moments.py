@@ -350,6 +350,35 @@ def _center(X, w, s, mask=None, const=None, inplace=True):
     return X, const
 
 
+def _select_columns(X, mask, column_selection):
+    """ Selects the columns given by column_selection and splits them into variable and constant columns.
+
+    Equivalent to first gathering :code:`Xk = X[:, column_selection]` and then selecting :code:`Xk[:, mask_k]` and
+    :code:`Xk[0, ~mask_k]`, but every column is gathered from X only once.
+
+    Parameters
+    ----------
+    X : ndarray(T, N)
+        data matrix
+    mask : ndarray(N, dtype=bool)
+        Array indicating the variable columns of X.
+    column_selection : ndarray(k, dtype=int)
+        Column indices to select.
+
+    Returns
+    -------
+    X0k : ndarray(T, l)
+        The selected variable columns, always a new array.
+    mask_k : ndarray(k, dtype=bool)
+        The mask restricted to the selected columns.
+    xkconst : ndarray(k - l)
+        Constant values of the selected columns that are not variable.
+    """
+    column_selection = np.asarray(column_selection)
+    mask_k = mask[column_selection]
+    return X[:, column_selection[mask_k]], mask_k, X[0, column_selection[~mask_k]]
+
+
 def _filter_variable_indices(mask, column_selection):
     """ Returns column indices restricted to the variable columns as determined by the given mask.
 
@@ -669,13 +698,9 @@ def moments_XX(X, remove_mean=False, modify_data=False, weights=None, sparse_mod
     # compute covariance matrix
     if column_selection is not None:
         if is_sparse:
-            Xk = X[:, column_selection]
-            mask_Xk = mask_X[column_selection]
-            X0k = Xk[:, mask_Xk]
+            X0k, mask_Xk, xkconst = _select_columns(X, mask_X, column_selection)
             xksum = sx0_centered[column_selection]
-            xkconst = Xk[0, ~mask_Xk]
-            X0k, xkconst = _copy_convert(X0k, const=xkconst, remove_mean=remove_mean,
-                                         copy=True)
+            X0k, xkconst = _copy_convert(X0k, const=xkconst, remove_mean=remove_mean, copy=False)
             C = _M2(X0, X0k, mask_X=mask_X, mask_Y=mask_Xk, xsum=sx0_centered, xconst=xconst, ysum=xksum, yconst=xkconst,
                     weights=weights)
         else:
@@ -799,21 +824,13 @@ def moments_XXXY(X, Y, remove_mean=False, symmetrize=False, weights=None,
     else:
         if column_selection is not None:
             if is_sparse:
-                Xk = X[:, column_selection]
-                mask_Xk = mask_X[column_selection]
-                X0k = Xk[:, mask_Xk]
+                X0k, mask_Xk, xkconst = _select_columns(X, mask_X, column_selection)
                 xksum = sx_centered[column_selection]
-                xkconst = Xk[0, ~mask_Xk]
-                X0k, xkconst = _copy_convert(X0k, const=xkconst, remove_mean=remove_mean,
-                                             copy=True)
+                X0k, xkconst = _copy_convert(X0k, const=xkconst, remove_mean=remove_mean, copy=False)
 
-                Yk = Y[:, column_selection]
-                mask_Yk = mask_Y[column_selection]
-                Y0k = Yk[:, mask_Yk]
+                Y0k, mask_Yk, ykconst = _select_columns(Y, mask_Y, column_selection)
                 yksum = sy_centered[column_selection]
-                ykconst = Yk[0, ~mask_Yk]
-                Y0k, ykconst = _copy_convert(Y0k, const=ykconst, remove_mean=remove_mean,
-                                             copy=True)
+                Y0k, ykconst = _copy_convert(Y0k, const=ykconst, remove_mean=remove_mean, copy=False)
 
                 Cxx = _M2(X0, X0k, mask_X=mask_X, mask_Y=mask_Xk, xsum=sx_centered, xconst=xconst, ysum=xksum, yconst=xkconst,
                         weights=weights)
@@ -917,21 +934,13 @@ def moments_block(X, Y, remove_mean=False, modify_data=False,
 
     if column_selection is not None:
         if is_sparse:
-            Xk = X[:, column_selection]
-            mask_Xk = mask_X[column_selection] if mask_X is not None else mask_X
-            X0k = Xk[:, mask_Xk]
+            X0k, mask_Xk, xkconst = _select_columns(X, mask_X, column_selection)
             xksum = sx_centered[column_selection]
-            xkconst = Xk[0, ~mask_Xk]
-            X0k, xkconst = _copy_convert(X0k, const=xkconst, remove_mean=remove_mean,
-                                         copy=True)
+            X0k, xkconst = _copy_convert(X0k, const=xkconst, remove_mean=remove_mean, copy=False)
 
-            Yk = Y[:, column_selection]
-            mask_Yk = mask_Y[column_selection] if mask_Y is not None else mask_Y
-            Y0k = Yk[:, mask_Yk]
+            Y0k, mask_Yk, ykconst = _select_columns(Y, mask_Y, column_selection)
             yksum = sy_centered[column_selection]
-            ykconst = Yk[0, ~mask_Yk]
-            Y0k, ykconst = _copy_convert(Y0k, const=ykconst, remove_mean=remove_mean,
-                                         copy=True)
+            Y0k, ykconst = _copy_convert(Y0k, const=ykconst, remove_mean=remove_mean, copy=False)
 
             Cxx = _M2(X0, X0k, mask_X=mask_X, mask_Y=mask_Xk,
                       xsum=sx_centered, xconst=xconst, ysum=xksum, yconst=xkconst)
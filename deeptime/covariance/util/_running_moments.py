@@ -248,7 +248,7 @@ class RunningCovar:
         if weights is not None:
             # Convert to array of length T if weights is a single number:
             if isinstance(weights, numbers.Real):
-                weights = weights * np.ones(T, dtype=float)
+                weights = np.full(T, weights, dtype=float)
             # Check appropriate length if weights is an array:
             elif isinstance(weights, np.ndarray):
                 if len(weights) != T:
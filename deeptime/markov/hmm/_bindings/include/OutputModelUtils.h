@@ -7,6 +7,7 @@
 #include <random>
 #include <thread>
 #include <iomanip>
+#include <vector>
 
 #include "common.h"
 #include "thread_utils.h"
@@ -33,6 +34,27 @@ void handleOutliers(np_array_nfc<dtype> &outputProbabilityTrajectory) {
 
 }
 
+/**
+ * Yields the (T, N) array output probabilities are written into: either the provided buffer or a new array.
+ */
+template<typename dtype>
+np_array<dtype> outputBuffer(const py::object &out, std::size_t T, std::size_t N) {
+    if (out.is_none()) {
+        return np_array<dtype>(std::vector<std::size_t>{T, N});
+    }
+    // no forcecast, a converted copy would silently not be written back into the buffer
+    if (!py::isinstance<np_array_nfc<dtype>>(out)) {
+        throw std::invalid_argument("out must be a C-contiguous array of the same dtype as the output model.");
+    }
+    auto buffer = py::cast<np_array<dtype>>(out);
+    if (buffer.ndim() != 2 || static_cast<std::size_t>(buffer.shape(0)) != T ||
+        static_cast<std::size_t>(buffer.shape(1)) != N) {
+        throw std::invalid_argument("Shape mismatch: out must be (T, N) = (" + std::to_string(T) + ", " +
+                                    std::to_string(N) + ") dimensional.");
+    }
+    return buffer;
+}
+
 
 namespace discrete {
 
@@ -80,7 +102,7 @@ np_array<std::int64_t> generateObservationTrajectory(const np_array_nfc<State> &
 
 template<typename dtype, typename State>
 np_array<dtype> toOutputProbabilityTrajectory(const np_array_nfc<State> &observations,
-                                              const np_array_nfc<dtype> &outputProbabilities) {
+                                              const np_array_nfc<dtype> &outputProbabilities, py::object out) {
     if (observations.ndim() != 1) {
         throw std::invalid_argument("observations trajectory needs to be one-dimensional.");
     }
@@ -89,14 +111,32 @@ np_array<dtype> toOutputProbabilityTrajectory(const np_array_nfc<State> &observa
     const auto* P = outputProbabilities.data();
     const auto* obs = observations.data();
 
-    np_array<dtype> output(std::vector<std::size_t>{static_cast<std::size_t>(observations.shape(0)), nHidden});
+    auto output = outputBuffer<dtype>(out, static_cast<std::size_t>(observations.shape(0)), nHidden);
     auto* outputPtr = output.mutable_data();
     auto T = observations.shape(0);
 
-    #pragma omp parallel for collapse(2) default(none) firstprivate(P, obs, nHidden, nObs, T, outputPtr)
-    for (ssize_t t = 0; t < T; ++t) {
+    if (static_cast<std::size_t>(T) >= nObs) {
+        // transposed copy of the output probabilities, (nObs, nHidden), so that each output row is one contiguous
+        // copy. Only pays off if there are more observations than observable states.
+        std::vector<dtype> PTransposed(nObs * nHidden);
         for (std::size_t i = 0; i < nHidden; ++i) {
-            outputPtr[t*nHidden + i] = P[obs[t] + i*nObs];
+            for (std::size_t o = 0; o < nObs; ++o) {
+                PTransposed[o * nHidden + i] = P[i * nObs + o];
+            }
+        }
+        const auto* PT = PTransposed.data();
+
+        #pragma omp parallel for default(none) firstprivate(PT, obs, nHidden, T, outputPtr)
+        for (ssize_t t = 0; t < T; ++t) {
+            const auto* row = PT + obs[t] * nHidden;
+            std::copy(row, row + nHidden, outputPtr + t * nHidden);
+        }
+    } else {
+        #pragma omp parallel for collapse(2) default(none) firstprivate(P, obs, nHidden, nObs, T, outputPtr)
+        for (ssize_t t = 0; t < T; ++t) {
+            for (std::size_t i = 0; i < nHidden; ++i) {
+                outputPtr[t*nHidden + i] = P[obs[t] + i*nObs];
+            }
         }
     }
 
@@ -237,11 +277,11 @@ np_array<dtype> pO(dtype o, const np_array_nfc<dtype> &mus, const np_array_nfc<d
 
 template<typename dtype>
 np_array<dtype> toOutputProbabilityTrajectory(const np_array_nfc<dtype> &obs, const np_array_nfc<dtype> &mus,
-                                              const np_array_nfc<dtype> &sigmas) {
+                                              const np_array_nfc<dtype> &sigmas, py::object out) {
     auto N = static_cast<std::size_t>(mus.shape(0));
     auto T = static_cast<std::size_t>(obs.shape(0));
 
-    np_array<dtype> p({T, N});
+    auto p = outputBuffer<dtype>(out, T, N);
     auto obsBuf = obs.data();
     auto musBuf = mus.data();
     auto sigmasBuf = sigmas.data();
@@ -120,4 +120,52 @@ Returns
 S : (T,) ndarray
     maximum likelihood hidden path
 )mydelim";
+
+static constexpr const char* FORWARD_BACKWARD_BATCH = R"mydelim(Run the forward-backward algorithm on several trajectories at once.
+
+The trajectories are processed in parallel, each thread holds its own forward and backward coefficients.
+
+Parameters
+----------
+transition_matrix : ndarray((N,N), dtype = float)
+    transition matrix of the hidden states
+state_probability_trajectories : list of ndarray((T_i,N), dtype = float)
+    state_probability_trajectories[k][t,i] is the observation probability for observation at time t of trajectory k
+    given hidden state i
+initial_distribution : ndarray((N), dtype = float)
+    initial distribution of hidden states
+gammas_out : list of ndarray((T_i,N), dtype = float)
+    containers for the state probabilities of each trajectory
+counts_out : ndarray((K,N,N), dtype = float)
+    container for the transition counts of each of the K trajectories
+n_threads : int, optional, default = 1
+    number of threads to use
+
+Returns
+-------
+logprob : float
+    The probability to observe all trajectories with the model given by `A`, `B` and `pi`.
+)mydelim";
+
+static constexpr const char* VITERBI_BATCH = R"mydelim(Estimate the hidden pathways of maximum likelihood for several trajectories using the Viterbi algorithm.
+
+The trajectories are processed in parallel.
+
+Parameters
+----------
+transition_matrix : ndarray((N,N), dtype = float)
+    transition matrix of the hidden states
+state_probability_trajectories : list of ndarray((T_i,N), dtype = float)
+    state_probability_trajectories[k][t,i] is the observation probability for observation at time t of trajectory k
+    given hidden state i
+initial_distribution : ndarray((N), dtype = float)
+    initial distribution of hidden states
+n_threads : int, optional, default = 1
+    number of threads to use
+
+Returns
+-------
+paths : list of ndarray((T_i,), dtype = int32)
+    maximum likelihood hidden paths
+)mydelim";
 }
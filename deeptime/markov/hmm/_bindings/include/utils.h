@@ -5,55 +5,14 @@
 #pragma once
 
 #include <thread>
+#include <numeric>
 
 #include "common.h"
 #include "distribution_utils.h"
 
-/**
- * computes viterbi path
- * @tparam dtype dtype
- * @param transitionMatrix (N, N) transition matrix
- * @param stateProbabilityTraj (T, N) pobs
- * @param initialDistribution (N,) init dist
- * @return (T, )ndarray
- */
 template<typename dtype>
-np_array<std::int32_t> viterbiPath(const np_array<dtype> &transitionMatrix, const np_array<dtype> &stateProbabilityTraj,
-                                   const np_array<dtype> &initialDistribution) {
-    if (transitionMatrix.ndim() < 1 || stateProbabilityTraj.ndim() < 1) {
-        throw std::invalid_argument("transition matrix and pobs need to be at least 1-dimensional.");
-    }
-    auto N = static_cast<std::size_t>(transitionMatrix.shape(0));
-    auto T = static_cast<std::size_t>(stateProbabilityTraj.shape(0));
-    {
-        // check shapes
-        if (transitionMatrix.ndim() != 2) throw std::invalid_argument("transition matrix must be 2-dimensional");
-        if (transitionMatrix.shape(1) != transitionMatrix.shape(0)) {
-            throw std::invalid_argument("Transition matrix must be (N, N) but was (" + std::to_string(N) + ", " +
-                                        std::to_string(transitionMatrix.shape(1)) + ")");
-        }
-        if (stateProbabilityTraj.ndim() != 2) throw std::invalid_argument("pobs must be 2-dimensional");
-        if (static_cast<std::size_t>(stateProbabilityTraj.shape(1)) != N) {
-            std::stringstream ss;
-            ss << "State probablity trajectory must be (T, N) = (" << T << ", " << N << ") dimensional but was (";
-            ss << stateProbabilityTraj.shape(0) << ", " << stateProbabilityTraj.shape(1) << ")";
-            throw std::invalid_argument(ss.str());
-        }
-        if (initialDistribution.ndim() != 1) throw std::invalid_argument("initial distribution must be 1-dimensional");
-        if (static_cast<std::size_t>(initialDistribution.shape(0)) != N) {
-            throw std::invalid_argument(
-                    "initial distribution must have length N = " + std::to_string(N) + " but had len=" +
-                    std::to_string(initialDistribution.shape(0)));
-        }
-        if (T == 0 || N == 0) {
-            throw std::invalid_argument("Needs T and N to be at least 1, i.e., no empty arrays permitted.");
-        }
-    }
-    np_array<std::int32_t> path(std::vector<std::size_t>{T});
-    auto pathBuf = path.mutable_data();
-    auto ABuf = transitionMatrix.data();
-    auto pobsBuf = stateProbabilityTraj.data();
-    auto piBuf = initialDistribution.data();
+void viterbiImpl(const dtype* const ABuf, const dtype* const pobsBuf, const dtype* const piBuf,
+                 std::int32_t* const pathBuf, std::size_t N, std::size_t T) {
     {
         std::fill(pathBuf, pathBuf + T, 0);
 
@@ -103,9 +62,67 @@ np_array<std::int32_t> viterbiPath(const np_array<dtype> &transitionMatrix, cons
         for (std::size_t t = T - 1; t >= 1; t--) {
             pathBuf[t - 1] = ptr[t * N + pathBuf[t]];
         }
+    }
+}
 
+/**
+ * checks that the transition matrix is (N, N) with N at least 1 and that the initial distribution is (N,)
+ * @tparam dtype dtype
+ * @param transitionMatrix transition matrix
+ * @param initialDistribution initial distribution
+ */
+template<typename dtype>
+void checkModelShapes(const np_array<dtype> &transitionMatrix, const np_array<dtype> &initialDistribution) {
+    if (transitionMatrix.ndim() != 2) throw std::invalid_argument("transition matrix must be 2-dimensional");
+    auto N = static_cast<std::size_t>(transitionMatrix.shape(0));
+    if (transitionMatrix.shape(1) != transitionMatrix.shape(0)) {
+        throw std::invalid_argument("Transition matrix must be (N, N) but was (" + std::to_string(N) + ", " +
+                                    std::to_string(transitionMatrix.shape(1)) + ")");
+    }
+    if (N == 0) {
+        throw std::invalid_argument("Needs T and N to be at least 1, i.e., no empty arrays permitted.");
+    }
+    if (initialDistribution.ndim() != 1) throw std::invalid_argument("initial distribution must be 1-dimensional");
+    if (static_cast<std::size_t>(initialDistribution.shape(0)) != N) {
+        throw std::invalid_argument(
+                "initial distribution must have length N = " + std::to_string(N) + " but had len=" +
+                std::to_string(initialDistribution.shape(0)));
+    }
+}
 
+/**
+ * computes viterbi path
+ * @tparam dtype dtype
+ * @param transitionMatrix (N, N) transition matrix
+ * @param stateProbabilityTraj (T, N) pobs
+ * @param initialDistribution (N,) init dist
+ * @return (T, )ndarray
+ */
+template<typename dtype>
+np_array<std::int32_t> viterbiPath(const np_array<dtype> &transitionMatrix, const np_array<dtype> &stateProbabilityTraj,
+                                   const np_array<dtype> &initialDistribution) {
+    if (transitionMatrix.ndim() < 1 || stateProbabilityTraj.ndim() < 1) {
+        throw std::invalid_argument("transition matrix and pobs need to be at least 1-dimensional.");
     }
+    auto N = static_cast<std::size_t>(transitionMatrix.shape(0));
+    auto T = static_cast<std::size_t>(stateProbabilityTraj.shape(0));
+    {
+        // check shapes
+        checkModelShapes(transitionMatrix, initialDistribution);
+        if (stateProbabilityTraj.ndim() != 2) throw std::invalid_argument("pobs must be 2-dimensional");
+        if (static_cast<std::size_t>(stateProbabilityTraj.shape(1)) != N) {
+            std::stringstream ss;
+            ss << "State probablity trajectory must be (T, N) = (" << T << ", " << N << ") dimensional but was (";
+            ss << stateProbabilityTraj.shape(0) << ", " << stateProbabilityTraj.shape(1) << ")";
+            throw std::invalid_argument(ss.str());
+        }
+        if (T == 0) {
+            throw std::invalid_argument("Needs T and N to be at least 1, i.e., no empty arrays permitted.");
+        }
+    }
+    np_array<std::int32_t> path(std::vector<std::size_t>{T});
+    viterbiImpl(transitionMatrix.data(), stateProbabilityTraj.data(), initialDistribution.data(), path.mutable_data(),
+                N, T);
     return path;
 }
 
@@ -136,22 +153,32 @@ dtype forwardImpl(const dtype*const  transitionMatrix, const dtype*const  pObs,
 
         // iterate trajectory
         for (std::size_t t = 0; t < T - 1; t++) {
-            scaling = 0.0;
-            // compute new alpha and scaling
-            //#pragma omp parallel for reduction(+:scaling) default(none) firstprivate(N, alpha, transitionMatrix, pObs, t)
+            const dtype* __restrict alphaCurrent = alpha + t * N;
+            dtype* __restrict alphaNext = alpha + (t + 1) * N;
+            // alpha[t+1] = alpha[t] A, accumulated row by row so that the innermost loop runs over contiguous
+            // memory of both A and alpha[t+1] and can be vectorized. Summation order is the same as for a
+            // column-wise dot product.
             for (std::size_t j = 0; j < N; j++) {
-                dtype sum = 0.0;
-                for (std::size_t i = 0; i < N; i++) {
-                    sum += alpha[t * N + i] * transitionMatrix[i * N + j];
+                alphaNext[j] = alphaCurrent[0] * transitionMatrix[j];
+            }
+            for (std::size_t i = 1; i < N; i++) {
+                const auto a = alphaCurrent[i];
+                const dtype* __restrict row = transitionMatrix + i * N;
+                for (std::size_t j = 0; j < N; j++) {
+                    alphaNext[j] += a * row[j];
                 }
-                alpha[(t + 1) * N + j] = sum * pObs[(t + 1) * N + j];
-                scaling += alpha[(t + 1) * N + j];
+            }
+            // compute new alpha and scaling
+            scaling = 0.0;
+            for (std::size_t j = 0; j < N; j++) {
+                alphaNext[j] *= pObs[(t + 1) * N + j];
+                scaling += alphaNext[j];
             }
             // scale this row
             if (scaling != 0) {
-                //#pragma omp parallel for default(none) firstprivate(N, alpha, scaling, t)
+                //#pragma omp parallel for default(none) firstprivate(N, alphaNext, scaling)
                 for (std::size_t j = 0; j < N; j++) {
-                    alpha[(t + 1) * N + j] /= scaling;
+                    alphaNext[j] /= scaling;
                 }
             }
 
@@ -452,3 +479,125 @@ dtype forwardBackward(const np_array<dtype> &transitionMatrix, const np_array<dt
     transitionCountsImpl(alphaBuf, betaBuf, P, pObsBuf, countsBuf, N, T);
     return logprob;
 }
+
+template<typename dtype>
+dtype forwardBackwardBatch(const np_array<dtype> &transitionMatrix, const py::list &pObsList,
+                           const np_array<dtype> &pi, const py::list &gammaList, np_array_nfc<dtype> &counts,
+                           int nThreads) {
+    checkModelShapes(transitionMatrix, pi);
+    auto N = static_cast<std::size_t>(transitionMatrix.shape(0));
+    auto nTrajs = py::len(pObsList);
+    if (py::len(gammaList) != nTrajs) {
+        throw std::invalid_argument("Need as many gamma arrays as there are state probability trajectories.");
+    }
+    if (counts.ndim() != 3 || static_cast<std::size_t>(counts.shape(0)) != nTrajs ||
+        static_cast<std::size_t>(counts.shape(1)) != N || static_cast<std::size_t>(counts.shape(2)) != N) {
+        throw std::invalid_argument("Shape mismatch: counts must be (n_trajs, N, N) dimensional.");
+    }
+
+    // keep (possibly converted) pobs alive and collect raw pointers while holding the GIL
+    std::vector<np_array<dtype>> pObs;
+    pObs.reserve(nTrajs);
+    std::vector<const dtype*> pObsPtrs(nTrajs);
+    std::vector<dtype*> gammaPtrs(nTrajs);
+    std::vector<std::size_t> lengths(nTrajs);
+    for (std::size_t i = 0; i < nTrajs; ++i) {
+        pObs.push_back(pObsList[i].cast<np_array<dtype>>());
+        const auto &p = pObs.back();
+        if (p.ndim() != 2 || static_cast<std::size_t>(p.shape(1)) != N || p.shape(0) == 0) {
+            throw std::invalid_argument("State probability trajectories must be non-empty and (T_i, N) dimensional.");
+        }
+        if (!py::isinstance<np_array_nfc<dtype>>(gammaList[i])) {
+            throw std::invalid_argument("Gammas must be C-contiguous arrays of the same dtype as the transition matrix.");
+        }
+        auto gamma = gammaList[i].cast<np_array_nfc<dtype>>();
+        if (gamma.ndim() != 2 || gamma.shape(0) != p.shape(0) || gamma.shape(1) != p.shape(1)) {
+            throw std::invalid_argument("Shape mismatch: gammas must have the same shape as state probability "
+                                        "trajectories.");
+        }
+        pObsPtrs[i] = p.data();
+        gammaPtrs[i] = gamma.mutable_data();
+        lengths[i] = static_cast<std::size_t>(p.shape(0));
+    }
+
+    const auto* P = transitionMatrix.data();
+    const auto* piBuf = pi.data();
+    auto* countsBuf = counts.mutable_data();
+    std::vector<dtype> logprobs(nTrajs);
+    // no point in spawning threads that never get a trajectory
+    auto nTeam = static_cast<int>(std::max<std::size_t>(
+            std::min<std::size_t>(static_cast<std::size_t>(std::max(nThreads, 1)), nTrajs), 1));
+
+    {
+        py::gil_scoped_release release;
+        #pragma omp parallel num_threads(nTeam) default(none) firstprivate(nTrajs, N, P, piBuf, countsBuf) \
+                shared(pObsPtrs, gammaPtrs, lengths, logprobs)
+        {
+            // scratch for forward and backward coefficients, one per thread, grown on demand
+            std::vector<dtype> alpha;
+            std::vector<dtype> beta;
+
+            #pragma omp for schedule(dynamic)
+            for (std::int64_t i = 0; i < static_cast<std::int64_t>(nTrajs); ++i) {
+                auto T = lengths[i];
+                if (alpha.size() < T * N) {
+                    alpha.resize(T * N);
+                    beta.resize(T * N);
+                }
+                logprobs[i] = forwardImpl(P, pObsPtrs[i], piBuf, alpha.data(), N, T);
+                backwardImpl(P, pObsPtrs[i], beta.data(), N, T);
+                stateProbabilitiesImpl(alpha.data(), beta.data(), gammaPtrs[i], N, T);
+                transitionCountsImpl(alpha.data(), beta.data(), P, pObsPtrs[i], countsBuf + i * N * N, N, T);
+            }
+        }
+    }
+    // sum up in fixed order so that the result does not depend on the number of threads
+    return std::accumulate(logprobs.begin(), logprobs.end(), static_cast<dtype>(0));
+}
+
+template<typename dtype>
+py::list viterbiBatch(const np_array<dtype> &transitionMatrix, const py::list &pObsList,
+                      const np_array<dtype> &initialDistribution, int nThreads) {
+    checkModelShapes(transitionMatrix, initialDistribution);
+    auto N = static_cast<std::size_t>(transitionMatrix.shape(0));
+    auto nTrajs = py::len(pObsList);
+
+    std::vector<np_array<dtype>> pObs;
+    pObs.reserve(nTrajs);
+    std::vector<np_array<std::int32_t>> paths;
+    paths.reserve(nTrajs);
+    std::vector<const dtype*> pObsPtrs(nTrajs);
+    std::vector<std::int32_t*> pathPtrs(nTrajs);
+    std::vector<std::size_t> lengths(nTrajs);
+    for (std::size_t i = 0; i < nTrajs; ++i) {
+        pObs.push_back(pObsList[i].cast<np_array<dtype>>());
+        const auto &p = pObs.back();
+        if (p.ndim() != 2 || static_cast<std::size_t>(p.shape(1)) != N || p.shape(0) == 0) {
+            throw std::invalid_argument("State probability trajectories must be non-empty and (T_i, N) dimensional.");
+        }
+        lengths[i] = static_cast<std::size_t>(p.shape(0));
+        paths.emplace_back(std::vector<std::size_t>{lengths[i]});
+        pObsPtrs[i] = p.data();
+        pathPtrs[i] = paths.back().mutable_data();
+    }
+
+    const auto* P = transitionMatrix.data();
+    const auto* piBuf = initialDistribution.data();
+    // no point in spawning threads that never get a trajectory
+    auto nTeam = static_cast<int>(std::max<std::size_t>(
+            std::min<std::size_t>(static_cast<std::size_t>(std::max(nThreads, 1)), nTrajs), 1));
+    {
+        py::gil_scoped_release release;
+        #pragma omp parallel for num_threads(nTeam) schedule(dynamic) default(none) \
+                firstprivate(nTrajs, N, P, piBuf) shared(pObsPtrs, pathPtrs, lengths)
+        for (std::int64_t i = 0; i < static_cast<std::int64_t>(nTrajs); ++i) {
+            viterbiImpl(P, pObsPtrs[i], piBuf, pathPtrs[i], N, lengths[i]);
+        }
+    }
+
+    py::list result;
+    for (auto &path : paths) {
+        result.append(path);
+    }
+    return result;
+}
@@ -26,13 +26,17 @@ PYBIND11_MODULE(_hmm_bindings, m) {
         discreteModule.def("generate_observation_trajectory",
                            &hmm::output_models::discrete::generateObservationTrajectory<double, std::int64_t>);
         discreteModule.def("to_output_probability_trajectory",
-                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<float, std::int32_t>);
+                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<float, std::int32_t>,
+                           "observations"_a, "output_probabilities"_a, "out"_a = py::none());
         discreteModule.def("to_output_probability_trajectory",
-                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<float, std::int64_t>);
+                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<float, std::int64_t>,
+                           "observations"_a, "output_probabilities"_a, "out"_a = py::none());
         discreteModule.def("to_output_probability_trajectory",
-                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<double, std::int32_t>);
+                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<double, std::int32_t>,
+                           "observations"_a, "output_probabilities"_a, "out"_a = py::none());
         discreteModule.def("to_output_probability_trajectory",
-                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<double, std::int64_t>);
+                           &hmm::output_models::discrete::toOutputProbabilityTrajectory<double, std::int64_t>,
+                           "observations"_a, "output_probabilities"_a, "out"_a = py::none());
         discreteModule.def("sample", &hmm::output_models::discrete::sample<float, std::int16_t>);
         discreteModule.def("sample", &hmm::output_models::discrete::sample<float, std::int32_t>);
         discreteModule.def("sample", &hmm::output_models::discrete::sample<float, std::int64_t>);
@@ -52,9 +56,11 @@ PYBIND11_MODULE(_hmm_bindings, m) {
                      "out"_a = py::none());
         gaussian.def("p_o", &hmm::output_models::gaussian::pO<float>, "o"_a, "mus"_a, "sigmas"_a, "out"_a = py::none());
         gaussian.def("to_output_probability_trajectory",
-                     &hmm::output_models::gaussian::toOutputProbabilityTrajectory<double>);
+                     &hmm::output_models::gaussian::toOutputProbabilityTrajectory<double>, "obs"_a, "mus"_a, "sigmas"_a,
+                     "out"_a = py::none());
         gaussian.def("to_output_probability_trajectory",
-                     &hmm::output_models::gaussian::toOutputProbabilityTrajectory<float>);
+                     &hmm::output_models::gaussian::toOutputProbabilityTrajectory<float>, "obs"_a, "mus"_a, "sigmas"_a,
+                     "out"_a = py::none());
         gaussian.def("generate_observation_trajectory",
                      &hmm::output_models::gaussian::generateObservationTrajectory<float>);
         gaussian.def("generate_observation_trajectory",
@@ -66,6 +72,8 @@ PYBIND11_MODULE(_hmm_bindings, m) {
         auto util = m.def_submodule("util");
         util.def("viterbi", &viterbiPath<float>, "transition_matrix"_a, "state_probability_trajectory"_a, "initial_distribution"_a, docs::VITERBI);
         util.def("viterbi", &viterbiPath<double>, "transition_matrix"_a, "state_probability_trajectory"_a, "initial_distribution"_a, docs::VITERBI);
+        util.def("viterbi_batch", &viterbiBatch<float>, "transition_matrix"_a, "state_probability_trajectories"_a, "initial_distribution"_a, "n_threads"_a = 1, docs::VITERBI_BATCH);
+        util.def("viterbi_batch", &viterbiBatch<double>, "transition_matrix"_a, "state_probability_trajectories"_a, "initial_distribution"_a, "n_threads"_a = 1, docs::VITERBI_BATCH);
         util.def("forward", &forward<float>, "transition_matrix"_a, "state_probability_trajectory"_a, "initial_distribution"_a, "alpha_out"_a, "T"_a = py::none(), docs::FORWARD);
         util.def("forward", &forward<double>, "transition_matrix"_a, "state_probability_trajectory"_a, "initial_distribution"_a, "alpha_out"_a, "T"_a = py::none(), docs::FORWARD);
         util.def("backward", &backward<float>, "transition_matrix"_a, "state_probability_trajectory"_a, "beta_out"_a, "T"_a = py::none(), docs::BACKWARD);
@@ -79,5 +87,7 @@ PYBIND11_MODULE(_hmm_bindings, m) {
         util.def("count_matrix", &countMatrix<std::int32_t>, "dtrajs"_a, "lag"_a, "n_states"_a);
         util.def("forward_backward", &forwardBackward<float>, "transition_matrix"_a, "pObs"_a, "pi"_a, "alpha"_a, "beta"_a, "gamma"_a, "counts"_a, "T"_a);
         util.def("forward_backward", &forwardBackward<double>, "transition_matrix"_a, "pObs"_a, "pi"_a, "alpha"_a, "beta"_a, "gamma"_a, "counts"_a, "T"_a);
+        util.def("forward_backward_batch", &forwardBackwardBatch<float>, "transition_matrix"_a, "state_probability_trajectories"_a, "initial_distribution"_a, "gammas_out"_a, "counts_out"_a, "n_threads"_a = 1, docs::FORWARD_BACKWARD_BATCH);
+        util.def("forward_backward_batch", &forwardBackwardBatch<double>, "transition_matrix"_a, "state_probability_trajectories"_a, "initial_distribution"_a, "gammas_out"_a, "counts_out"_a, "n_threads"_a = 1, docs::FORWARD_BACKWARD_BATCH);
     }
 }
@@ -7,10 +7,12 @@ from scipy.sparse import issparse
 
 from ...base import Estimator
 from .._transition_matrix import estimate_P, stationary_distribution
-from ._hidden_markov_model import HiddenMarkovModel, viterbi
+from ._hidden_markov_model import HiddenMarkovModel
+from ._output_model import OutputModel, DiscreteOutputModel, GaussianOutputModel
 from ..msm import MarkovStateModel
 from .. import TransitionCountModel, compute_dtrajs_effective
 from ._hmm_bindings import util as _util
+from ...util.parallel import handle_n_jobs
 from ...util.types import ensure_timeseries_data
 
 
@@ -65,6 +67,13 @@ class MaximumLikelihoodHMM(Estimator):
         accuracy, the iteration is stopped without convergence and a warning is given.
     maxit_reversible : int, optional, default=1000000
         Maximum number of iterations for reversible transition matrix estimation. Only used with reversible=True.
+    n_jobs : int, optional, default=None
+        Number of threads to use for the forward-backward passes over the trajectories. If None, all available
+        cores are used.
+    compute_viterbi : bool, optional, default=True
+        Whether to compute the hidden state trajectories as Viterbi paths under the estimated model. If False, the
+        most probable hidden state of each frame according to the state probabilities of the last EM iteration is
+        used instead, which comes without additional cost.
 
     References
     ----------
@@ -77,7 +86,8 @@ class MaximumLikelihoodHMM(Estimator):
     def __init__(self, initial_model: HiddenMarkovModel, stride: Union[int, str] = 1,
                  lagtime: int = 1, reversible: bool = True, stationary: bool = False,
                  p: Optional[np.ndarray] = None, accuracy: float = 1e-3,
-                 maxit: int = 1000, maxit_reversible: int = 100000):
+                 maxit: int = 1000, maxit_reversible: int = 100000, n_jobs: Optional[int] = None,
+                 compute_viterbi: bool = True):
         super().__init__()
         self.initial_model = initial_model
         self.stride = stride
@@ -93,6 +103,8 @@ class MaximumLikelihoodHMM(Estimator):
         self.accuracy = accuracy
         self.maxit = maxit
         self.maxit_reversible = maxit_reversible
+        self.n_jobs = n_jobs
+        self.compute_viterbi = compute_viterbi
 
     def fetch_model(self) -> HiddenMarkovModel:
         r""" Yields the current HiddenMarkovModel or None if :meth:`fit` was not called yet.
@@ -113,6 +125,24 @@ class MaximumLikelihoodHMM(Estimator):
     def maxit_reversible(self, value: int):
         self._maxit_reversible = int(value)
 
+    @property
+    def n_jobs(self) -> int:
+        r""" Number of threads to use for the forward-backward passes over the trajectories. """
+        return self._n_jobs
+
+    @n_jobs.setter
+    def n_jobs(self, value: Optional[int]):
+        self._n_jobs = handle_n_jobs(value)
+
+    @property
+    def compute_viterbi(self) -> bool:
+        r""" Whether hidden state trajectories are computed as Viterbi paths or taken from the state probabilities. """
+        return self._compute_viterbi
+
+    @compute_viterbi.setter
+    def compute_viterbi(self, value: bool):
+        self._compute_viterbi = bool(value)
+
     @property
     def fixed_stationary_distribution(self) -> Optional[np.ndarray]:
         r"""Fix the stationary distribution to the provided value. Only used when :attr:`stationary` is True, otherwise
@@ -260,65 +290,72 @@ class MaximumLikelihoodHMM(Estimator):
         dtrajs = compute_dtrajs_effective(dtrajs, lagtime=self.lagtime, n_states=initial_model.n_hidden_states,
                                           stride=self.stride)
 
-        max_n_frames = max(len(obs) for obs in dtrajs)
+        lengths = np.array([len(obs) for obs in dtrajs])
         # pre-construct hidden variables
         N = initial_model.n_hidden_states
-        alpha = np.zeros((max_n_frames, N))
-        beta = np.zeros((max_n_frames, N))
-        gammas = [np.zeros((len(obs), N)) for obs in dtrajs]
-        count_matrices = [np.zeros((N, N)) for _ in dtrajs]
+        # one allocation for all state probabilities, gammas are views into it
+        traj_starts = np.cumsum(lengths)[:-1]
+        state_probabilities = np.zeros((lengths.sum(), N))
+        gammas = np.split(state_probabilities, traj_starts)
+        # observations in one contiguous buffer, output probabilities are evaluated for all trajectories at once
+        observations = np.concatenate(dtrajs)
+        # buffer for the output probabilities, overwritten in each E-step. kept in the dtype of the E-step buffers so
+        # that the batch kernel does not convert each trajectory in each iteration
+        pobs = np.empty_like(state_probabilities)
+        count_matrices = np.zeros((len(dtrajs), N, N))
 
         it = 0
-        likelihoods = np.empty(self.maxit)
+        likelihoods = []
         # flag if connectivity has changed (e.g. state lost) - in that case the likelihood
         # is discontinuous and can't be used as a convergence criterion in that iteration.
-        tmatrix_nonzeros = hmm_data.transition_matrix.nonzero()
+        tmatrix_nonzeros = hmm_data.transition_matrix != 0
         converged = False
 
         while not converged and it < self.maxit:
-            loglik = 0.0
-            for obs, gamma, counts in zip(dtrajs, gammas, count_matrices):
-                loglik_update, _ = self._forward_backward(hmm_data, obs, alpha, beta, gamma, counts)
-                loglik += loglik_update
+            loglik = self._forward_backward(hmm_data, observations, traj_starts, pobs, gammas, count_matrices,
+                                            self.n_jobs)
             assert np.isfinite(loglik), it
 
             # convergence check
             if it > 0:
-                dL = loglik - likelihoods[it - 1]
+                dL = loglik - likelihoods[-1]
                 if dL < self.accuracy:
                     converged = True
 
             # update model
-            self._update_model(hmm_data, dtrajs, gammas, count_matrices, maxiter=self.maxit_reversible)
+            self._update_model(hmm_data, dtrajs, state_probabilities, traj_starts, count_matrices,
+                               maxiter=self.maxit_reversible)
 
             # connectivity change check
-            tmatrix_nonzeros_new = hmm_data.transition_matrix.nonzero()
+            tmatrix_nonzeros_new = hmm_data.transition_matrix != 0
             if not np.array_equal(tmatrix_nonzeros, tmatrix_nonzeros_new):
                 converged = False  # unset converged
                 tmatrix_nonzeros = tmatrix_nonzeros_new
 
             # end of iteration
-            likelihoods[it] = loglik
+            likelihoods.append(loglik)
             it += 1
 
-        likelihoods = np.resize(likelihoods, it)
+        likelihoods = np.array(likelihoods)
 
         transition_counts = self._reduce_transition_counts(count_matrices)
 
         count_model = TransitionCountModel(count_matrix=transition_counts, lagtime=self.lagtime)
         transition_model = MarkovStateModel(hmm_data.transition_matrix, reversible=self.reversible,
                                             count_model=count_model)
-        hidden_state_trajs = [
-            viterbi(hmm_data.transition_matrix, hmm_data.output_model.to_state_probability_trajectory(obs),
-                    hmm_data.initial_distribution) for obs in dtrajs
-        ]
+        if self.compute_viterbi:
+            pobs = _output_probabilities(hmm_data.output_model, observations, pobs)
+            hidden_state_trajs = _util.viterbi_batch(hmm_data.transition_matrix, np.split(pobs, traj_starts),
+                                                     hmm_data.initial_distribution, self.n_jobs)
+        else:
+            hidden_state_trajs = np.split(np.argmax(state_probabilities, axis=1).astype(np.int32), traj_starts)
         model = HiddenMarkovModel(
             transition_model=transition_model,
             output_model=hmm_data.output_model,
             initial_distribution=hmm_data.initial_distribution,
             likelihoods=likelihoods,
             state_probabilities=gammas,
-            initial_count=self._init_counts(gammas),
+            initial_count=self._init_counts(state_probabilities, traj_starts),
             hidden_state_trajectories=hidden_state_trajs,
             stride=self.stride
         )
@@ -326,66 +363,66 @@ class MaximumLikelihoodHMM(Estimator):
         return self
 
     @staticmethod
-    def _forward_backward(model: _HMMModelStorage, obs, alpha, beta, gamma, counts):
-        """ Estimation step: Runs the forward-back algorithm on trajectory obs
+    def _forward_backward(model: _HMMModelStorage, observations, traj_starts, pobs, gammas, count_matrices,
+                          n_threads):
+        """ Estimation step: Runs the forward-back algorithm on all trajectories
 
         Parameters
         ----------
         model: _HMMModelStorage
             named tuple with transition matrix, initial distribution, output model
-        obs: np.ndarray
-            single observation corresponding to index itraj
-        alpha: ndarray
-            forward coefficients
-        beta: ndarray
-            backward coefficients
-        gamma: ndarray
-            gammas
-        counts: ndarray
-            count matrix
+        observations: np.ndarray
+            all observation trajectories concatenated
+        traj_starts: np.ndarray
+            indices into observations at which the second, third, ... trajectory start
+        pobs: ndarray
+            buffer for the output probabilities of all observations
+        gammas: list of ndarray
+            gammas, one per trajectory
+        count_matrices: ndarray
+            count matrices, one per trajectory stacked along the first axis
+        n_threads: int
+            number of threads to use
 
         Returns
         -------
         logprob : float
-            The probability to observe the observation sequence given the HMM
+            The probability to observe the observation sequences given the HMM
             parameters
-        pobs : ndarray
-            state probability trajectory obtained from obs
         """
-        # get parameters
-        A = model.transition_matrix
-        pi = model.initial_distribution
-        T = len(obs)
-        # compute output probability matrix
-        pobs = model.output_model.to_state_probability_trajectory(obs)
-        pobs = pobs.astype(A.dtype)
+        # compute output probability matrices in place, per-trajectory pobs are views into the buffer
+        pobs = _output_probabilities(model.output_model, observations, pobs)
         # run forward - backward pass
-        logprob = _util.forward_backward(A, pobs, pi, alpha, beta, gamma, counts, T)
-        return logprob, pobs
+        return _util.forward_backward_batch(model.transition_matrix, np.split(pobs, traj_starts),
+                                            model.initial_distribution, gammas, count_matrices, n_threads)
 
-    def _init_counts(self, gammas):
-        gamma0_sum = np.zeros(self.n_hidden_states)
-        # update state counts
-        for g in gammas:
-            gamma0_sum += g[0]
-        return gamma0_sum
+    @staticmethod
+    def _init_counts(state_probabilities, traj_starts):
+        # gammas are rows of one buffer, gather the first row of each trajectory and sum them in a single reduction
+        return state_probabilities[np.r_[0, traj_starts]].sum(axis=0)
 
     @staticmethod
     def _reduce_transition_counts(count_matrices):
-        return np.add.reduce(count_matrices)
+        return count_matrices.sum(axis=0)
 
-    def _update_model(self, model: _HMMModelStorage, observations: List[np.ndarray], gammas: List[np.ndarray],
-                      count_matrices: List[np.ndarray], maxiter: int = int(1e7)):
+    def _update_model(self, model: _HMMModelStorage, observations: List[np.ndarray], state_probabilities: np.ndarray,
+                      traj_starts: np.ndarray, count_matrices: np.ndarray, maxiter: int = int(1e7)):
         """
         Maximization step: Updates the HMM model given the hidden state assignment and count matrices
 
         Parameters
         ----------
-        gammas : [ ndarray(T,N, dtype=float) ]
-            list of state probabilities for each trajectory
-        count_matrices : [ ndarray(N,N, dtype=float) ]
-            list of the Baum-Welch transition count matrices for each hidden
-            state trajectory
+        model : _HMMModelStorage
+            named tuple with transition matrix, initial distribution, output model, updated in place
+        observations : [ ndarray(T) ]
+            list of observation trajectories
+        state_probabilities : ndarray(sum T,N, dtype=float)
+            state probabilities (gammas) of all trajectories concatenated
+        traj_starts : ndarray
+            indices into state_probabilities at which the second, third, ... trajectory start
+        count_matrices : ndarray(n_trajs,N,N, dtype=float)
+            the Baum-Welch transition count matrices for each hidden
+            state trajectory, stacked along the first axis
         maxiter : int
             maximum number of iterations of the transition matrix estimation if
             an iterative method is used.
@@ -404,14 +441,14 @@ class MaximumLikelihoodHMM(Estimator):
                 pi = self.fixed_stationary_distribution
         else:
             if self.fixed_initial_distribution is None:
-                gamma0_sum = self._init_counts(gammas)
+                gamma0_sum = self._init_counts(state_probabilities, traj_starts)
                 pi = gamma0_sum / np.sum(gamma0_sum)
             else:
                 pi = self.fixed_initial_distribution
 
         model.initial_distribution[:] = pi
         model.transition_matrix[:] = T
-        model.output_model.fit(observations, gammas)
+        model.output_model.fit(observations, np.split(state_probabilities, traj_starts))
 
     def chapman_kolmogorov_validator(self, mlags, test_model: HiddenMarkovModel = None):
         r""" Creates a validator instance which can be used to perform a Chapman-Kolmogorov test.
@@ -440,13 +477,32 @@ class MaximumLikelihoodHMM(Estimator):
         test_model = self.fetch_model() if test_model is None else test_model
         assert test_model is not None, "We need a test model via argument or an estimator which was already" \
                                        "fit to data."
-        from . import DiscreteOutputModel
         assert isinstance(test_model.output_model, DiscreteOutputModel), \
             "Can only perform CKTest for discrete output models"
         lagtime = test_model.lagtime
         return MLHMMChapmanKolmogorovValidator(test_model, self, np.eye(test_model.n_hidden_states), lagtime, mlags)
 
 
+def _output_probabilities(output_model: OutputModel, observations: np.ndarray, out: np.ndarray) -> np.ndarray:
+    r""" Evaluates the output probabilities of the observations into the buffer `out` and returns it. Only the
+    built-in output models write into the buffer directly, other output models are called with the observations
+    alone and their result is copied over. """
+    method = type(output_model).to_state_probability_trajectory
+    if method is DiscreteOutputModel.to_state_probability_trajectory:
+        writes_into_buffer = output_model.output_probabilities.dtype == out.dtype
+    elif method is GaussianOutputModel.to_state_probability_trajectory:
+        writes_into_buffer = output_model.means.dtype == out.dtype
+    else:
+        writes_into_buffer = False
+    if writes_into_buffer:
+        pobs = output_model.to_state_probability_trajectory(observations, out=out)
+    else:
+        pobs = output_model.to_state_probability_trajectory(observations)
+    if pobs is not out:
+        out[...] = pobs
+    return out
+
+
 def _ck_estimate_model_for_lag(estimator: MaximumLikelihoodHMM, model: HiddenMarkovModel, data, lagtime):
     from .init.discrete import metastable_from_data
     initial_model = metastable_from_data(data, n_hidden_states=model.n_hidden_states, lagtime=lagtime,
@@ -454,7 +510,8 @@ def _ck_estimate_model_for_lag(estimator: MaximumLikelihoodHMM, model: HiddenMar
                                          stationary=estimator.stationary)
     estimator = MaximumLikelihoodHMM(initial_model, lagtime=lagtime, reversible=estimator.reversible,
                                      stationary=estimator.stationary, accuracy=estimator.accuracy,
-                                     maxit=estimator.maxit, maxit_reversible=estimator.maxit_reversible)
+                                     maxit=estimator.maxit, maxit_reversible=estimator.maxit_reversible,
+                                     n_jobs=estimator.n_jobs, compute_viterbi=estimator.compute_viterbi)
     hmm = estimator.fit(data).fetch_model()
     return hmm.submodel_largest(dtrajs=data)
 
@@ -207,13 +207,16 @@ class DiscreteOutputModel(OutputModel):
         """
         return self._output_probabilities
 
-    def to_state_probability_trajectory(self, observations: np.ndarray) -> np.ndarray:
+    def to_state_probability_trajectory(self, observations: np.ndarray,
+                                        out: Optional[np.ndarray] = None) -> np.ndarray:
         r""" Returns the output probabilities for an entire trajectory and all hidden states.
 
         Parameters
         ----------
         observations : ndarray((T), dtype=int)
             a discrete trajectory of length T
+        out : ndarray((T, N), dtype=float), optional, default=None
+            buffer to write the output probabilities into, a new array is allocated if None
 
         Return
         ------
@@ -221,7 +224,7 @@ class DiscreteOutputModel(OutputModel):
             The probability of generating the symbol at time point t from any of the N hidden states.
         """
         state_probabilities = _bindings.discrete.to_output_probability_trajectory(observations,
-                                                                                  self.output_probabilities)
+                                                                                  self.output_probabilities, out)
         if self.ignore_outliers:
             self._handle_outliers(state_probabilities)
         return state_probabilities
@@ -329,8 +332,10 @@ class GaussianOutputModel(OutputModel):
         r""" Standard deviations of Gaussian output densities. """
         return self._sigmas
 
-    def to_state_probability_trajectory(self, observations: np.ndarray) -> np.ndarray:
-        state_probabilities = _bindings.gaussian.to_output_probability_trajectory(observations, self.means, self.sigmas)
+    def to_state_probability_trajectory(self, observations: np.ndarray,
+                                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        state_probabilities = _bindings.gaussian.to_output_probability_trajectory(observations, self.means, self.sigmas,
+                                                                                  out)
         if self.ignore_outliers:
             self._handle_outliers(state_probabilities)
         return state_probabilities
@@ -32,7 +32,8 @@ def timeshifted_split(inputs, lagtime: int, chunksize: int = 1000, stride: int =
     Returns
     -------
     iterable : Generator
-        A Python generator which can be iterated.
+        A Python generator which can be iterated. Without shuffling, the blocks are views into the inputs, i.e.,
+        modifying a block in place modifies the input data. With shuffling, the blocks are copies.
 
     Examples
     --------
@@ -65,9 +66,10 @@ def timeshifted_split(inputs, lagtime: int, chunksize: int = 1000, stride: int =
             inputs = list(inputs)
         inputs = [inputs]
 
-    if not all(len(data) > lagtime for data in inputs):
-        too_short_inputs = [i for i, x in enumerate(inputs) if len(x) < lagtime]
-        raise ValueError(f'Input contained to short (smaller than lagtime({lagtime}) at following '
+    lengths = np.array([len(data) for data in inputs])
+    if not np.all(lengths > lagtime):
+        too_short_inputs = np.where(lengths <= lagtime)[0].tolist()
+        raise ValueError(f'Input contained to short (not longer than lagtime({lagtime})) at following '
                          f'indices: {too_short_inputs}')
 
     for data in inputs:
@@ -85,6 +87,9 @@ def timeshifted_split(inputs, lagtime: int, chunksize: int = 1000, stride: int =
             assert n_splits >= 1
             for ix_split in np.array_split(ix, n_splits):
                 if len(ix_split) > 0:
+                    if not shuffle:
+                        # contiguous block, basic slicing yields a view instead of a fancy-indexed copy
+                        ix_split = slice(ix_split[0], ix_split[-1] + 1)
                     x = data[ix_split]
                     if lagtime > 0:
                         x_lagged = data_lagged[ix_split]
@@ -94,17 +99,17 @@ def timeshifted_split(inputs, lagtime: int, chunksize: int = 1000, stride: int =
                 else:
                     break
         else:
-            t = 0
-            while t < len(data):
-                if t == len(data_lagged):
-                    break
-                x = data[ix[t:min(t + chunksize, len(data))]]
+            # data and data_lagged are of same length by construction, so the block boundaries can be fixed upfront
+            n_frames = len(data)
+            for t in range(0, n_frames, chunksize):
+                block = slice(t, min(t + chunksize, n_frames))
+                if shuffle:
+                    block = ix[block]
+                x = data[block]
                 if lagtime > 0:
-                    x_lagged = data_lagged[ix[t:min(t + chunksize, len(data_lagged))]]
-                    yield x, x_lagged
+                    yield x, data_lagged[block]
                 else:
                     yield x
-                t += chunksize
 
 
 class ConcatDataset(Dataset):
@@ -174,7 +179,8 @@ class TimeLaggedDataset(Dataset):
         self._data_lagged.setflags(write=write)
 
     def astype(self, dtype):
-        r""" Sets the datatype of contained arrays and returns a new instance of TimeLaggedDataset.
+        r""" Sets the datatype of contained arrays and returns a new instance of TimeLaggedDataset. Arrays which
+        already are of the requested dtype are not copied.
 
         Parameters
         ----------
@@ -186,7 +192,7 @@ class TimeLaggedDataset(Dataset):
         converted_ds : TimeLaggedDataset
             The dataset with converted dtype.
         """
-        return TimeLaggedDataset(self._data.astype(dtype), self._data_lagged.astype(dtype))
+        return TimeLaggedDataset(self._data.astype(dtype, copy=False), self._data_lagged.astype(dtype, copy=False))
 
     @property
     def data(self) -> np.ndarray:
@@ -253,9 +259,9 @@ class TimeLaggedConcatDataset(ConcatDataset):
     def __getitem__(self, ix):
         if isinstance(ix, slice):
             xs, ys = [], []
-            end_ds, end_ix = self._dataset_index(ix.stop if ix.stop is not None else len(self))
-            start_ds, start = self._dataset_index(ix.start if ix.start is not None else 0)
-            stride = ix.step if ix.step is not None else 1
+            start, stop, stride = ix.indices(len(self))
+            end_ds, end_ix = self._dataset_index(stop)
+            start_ds, start = self._dataset_index(start)
             for ds in range(start_ds, end_ds + 1):
                 stop_ix = self._lengths[ds] if ds != end_ds else end_ix
 
@@ -264,6 +270,12 @@ class TimeLaggedConcatDataset(ConcatDataset):
                     xs.append(self._datasets[ds].data[local_slice])
                     ys.append(self._datasets[ds].data_lagged[local_slice])
                     start = self._compute_overlap(stride, self._lengths[ds], start)
+            if len(xs) == 0:
+                # empty selection, keep trailing shape and dtype
+                return self._datasets[0].data[:0], self._datasets[0].data_lagged[:0]
+            if len(xs) == 1:
+                # slice stays within one dataset, no need to copy into a concatenated buffer
+                return xs[0], ys[0]
             return np.concatenate(xs), np.concatenate(ys)
         else:
             return super().__getitem__(ix)
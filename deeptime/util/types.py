@@ -5,7 +5,7 @@ from typing import Tuple, Optional, Union, List
 import numpy as np
 from scipy.sparse import spmatrix, issparse
 
-from .data import TimeLaggedDataset, TrajectoryDataset, TrajectoriesDataset
+from .data import TimeLaggedDataset, TimeLaggedConcatDataset, TrajectoryDataset, TrajectoriesDataset
 
 
 def atleast_nd(ary, ndim, pos=0):
@@ -251,6 +251,9 @@ def to_dataset(data: Union[TimeLaggedDataset, Tuple[np.ndarray, np.ndarray], np.
         data = ensure_timeseries_data(data)
         return TrajectoriesDataset.from_numpy(lagtime, data)
     assert hasattr(data, '__len__') and len(data) > 0, "Data is empty."
+    if isinstance(data, (TimeLaggedDataset, TimeLaggedConcatDataset)):
+        # known time-lagged dataset types, no need to probe the first element
+        return data
     assert is_timelagged_dataset(data), \
         "Data is not a time-lagged dataset, i.e., yielding tuples of instantaneous and time-lagged data. " \
         "In case of multiple trajectories, deeptime.util.data.TrajectoriesDataset may be used."
@@ -501,3 +501,24 @@ class TestMoments(unittest.TestCase):
                                  sparse_mode='sparse', sparse_tol=self.sparse_tol)
         self._test_moments_block(self.X_100_sparseconst, self.Y_100_sparseconst, self.cols_100, remove_mean=True,
                                  sparse_mode='sparse', sparse_tol=self.sparse_tol)
+
+    def test_column_selection_sparseconst_matches_dense(self):
+        # selection mixing variable and constant columns, out of order
+        X, Y = self.X_100_sparseconst, self.Y_100_sparseconst
+        cols = np.array([50, 3, 0, 99, 7, 20])
+        for remove_mean in [False, True]:
+            kw = dict(remove_mean=remove_mean, modify_data=False, column_selection=cols)
+            _, _, C_sparse = moments_XX(X, sparse_mode='sparse', sparse_tol=self.sparse_tol, **kw)
+            _, _, C_dense = moments_XX(X, sparse_mode='dense', **kw)
+            np.testing.assert_array_almost_equal(C_sparse, C_dense)
+
+            *_, C_XX_sparse, C_XY_sparse = moments_XXXY(X, Y, sparse_mode='sparse', sparse_tol=self.sparse_tol, **kw)
+            *_, C_XX_dense, C_XY_dense = moments_XXXY(X, Y, sparse_mode='dense', **kw)
+            np.testing.assert_array_almost_equal(C_XX_sparse, C_XX_dense)
+            np.testing.assert_array_almost_equal(C_XY_sparse, C_XY_dense)
+
+            _, _, C_sparse = moments_block(X, Y, sparse_mode='sparse', sparse_tol=self.sparse_tol, **kw)
+            _, _, C_dense = moments_block(X, Y, sparse_mode='dense', **kw)
+            for i in range(2):
+                for j in range(2):
+                    np.testing.assert_array_almost_equal(C_sparse[i][j], C_dense[i][j])
@@ -29,6 +29,36 @@ def test_disconnected_dtraj_sanity(mode, reversible):
         BayesianHMM(hmm.submodel_largest(dtrajs=dtrajs), reversible=reversible).fit(dtrajs)
 
 
+def test_hidden_state_trajectories_without_viterbi():
+    dtraj = DoubleWellDiscrete().dtraj
+    init_hmm = init.discrete.metastable_from_data(dtraj, n_hidden_states=2, lagtime=10)
+    hmm = MaximumLikelihoodHMM(init_hmm, lagtime=10, compute_viterbi=False).fit(dtraj).fetch_model()
+    hmm_viterbi = MaximumLikelihoodHMM(init_hmm, lagtime=10).fit(dtraj).fetch_model()
+    assert len(hmm.hidden_state_trajectories) == len(hmm.state_probabilities)
+    for traj, probs, traj_viterbi in zip(hmm.hidden_state_trajectories, hmm.state_probabilities,
+                                         hmm_viterbi.hidden_state_trajectories):
+        np.testing.assert_array_equal(traj, np.argmax(probs, axis=1))
+        np.testing.assert_(np.mean(traj == traj_viterbi) > .95)
+
+
+def test_output_model_without_out_argument():
+    class LegacyDiscreteOutputModel(DiscreteOutputModel):
+        def to_state_probability_trajectory(self, observations):
+            return super().to_state_probability_trajectory(observations).copy()
+
+    dtraj = DoubleWellDiscrete().dtraj
+    init_hmm = init.discrete.metastable_from_data(dtraj, n_hidden_states=2, lagtime=10)
+    legacy_output_model = LegacyDiscreteOutputModel(init_hmm.output_model.output_probabilities)
+    legacy_init_hmm = HiddenMarkovModel(init_hmm.transition_model, legacy_output_model,
+                                        initial_distribution=init_hmm.initial_distribution)
+    hmm = MaximumLikelihoodHMM(init_hmm, lagtime=10).fit(dtraj).fetch_model()
+    hmm_legacy = MaximumLikelihoodHMM(legacy_init_hmm, lagtime=10).fit(dtraj).fetch_model()
+    np.testing.assert_array_almost_equal(hmm.transition_model.transition_matrix,
+                                         hmm_legacy.transition_model.transition_matrix)
+    np.testing.assert_array_almost_equal(hmm.output_probabilities, hmm_legacy.output_probabilities)
+    np.testing.assert_array_almost_equal(hmm.likelihoods, hmm_legacy.likelihoods)
+
+
 class TestAlgorithmsAgainstReference(unittest.TestCase):
     """ Tests against example from Wikipedia: http://en.wikipedia.org/wiki/Forward-backward_algorithm#Example """
 
@@ -113,10 +143,54 @@ class TestAlgorithmsAgainstReference(unittest.TestCase):
         ])
         np.testing.assert_array_almost_equal(gamma, gamma_ref, decimal=4)
 
+    def test_forward_backward_batch(self):
+        pobs = [self.state_probabilities, self.state_probabilities[:3], self.state_probabilities[::-1]]
+        pi = np.array([0.5, 0.5])
+        gammas = [np.zeros_like(p) for p in pobs]
+        counts = np.zeros((len(pobs), 2, 2))
+        logprob = _bindings.util.forward_backward_batch(self.transition_probabilities, pobs, pi, gammas, counts,
+                                                        n_threads=2)
+        ref_logprob = 0.
+        for p, gamma, count_matrix in zip(pobs, gammas, counts):
+            alpha, beta, ref_gamma, ref_counts = [np.zeros_like(p) for _ in range(3)] + [np.zeros((2, 2))]
+            ref_logprob += _bindings.util.forward_backward(self.transition_probabilities, p, pi, alpha, beta,
+                                                           ref_gamma, ref_counts, len(p))
+            np.testing.assert_array_almost_equal(gamma, ref_gamma)
+            np.testing.assert_array_almost_equal(count_matrix, ref_counts)
+        np.testing.assert_almost_equal(logprob, ref_logprob)
+        np.testing.assert_array_almost_equal(gammas[0], [
+            [0.8673, 0.1327],
+            [0.8204, 0.1796],
+            [0.3075, 0.6925],
+            [0.8204, 0.1796],
+            [0.8673, 0.1327]
+        ], decimal=4)
+
     def test_viterbi(self):
         path = viterbi(self.transition_probabilities, self.state_probabilities, np.array([0.5, 0.5]))
         np.testing.assert_array_equal(path, self.dtraj)
 
+    def test_viterbi_batch(self):
+        pobs = [self.state_probabilities, self.state_probabilities[1:], self.state_probabilities[::-1]]
+        paths = _bindings.util.viterbi_batch(self.transition_probabilities, pobs, np.array([0.5, 0.5]), n_threads=2)
+        np.testing.assert_equal(len(paths), len(pobs))
+        for p, path in zip(pobs, paths):
+            np.testing.assert_array_equal(path, viterbi(self.transition_probabilities, p, np.array([0.5, 0.5])))
+        np.testing.assert_array_equal(paths[0], self.dtraj)
+
+    def test_batch_shape_checks(self):
+        pobs = [self.state_probabilities]
+        gammas = [np.zeros_like(self.state_probabilities)]
+        counts = np.zeros((1, 2, 2))
+        pi = np.array([0.5, 0.5])
+        for transition_matrix, initial_distribution in [(self.transition_probabilities[:1], pi),
+                                                        (self.transition_probabilities.ravel(), pi),
+                                                        (self.transition_probabilities, pi[:1])]:
+            with self.assertRaises(ValueError):
+                _bindings.util.viterbi_batch(transition_matrix, pobs, initial_distribution)
+            with self.assertRaises(ValueError):
+                _bindings.util.forward_backward_batch(transition_matrix, pobs, initial_distribution, gammas, counts)
+
 
 class TestMLHMM(unittest.TestCase):
 
@@ -70,6 +70,14 @@ class TestDiscrete(unittest.TestCase):
         for state, prob in zip(obs_traj, prob_traj):
             np.testing.assert_equal(prob, output_probabilities[:, state])
 
+        out = np.empty_like(prob_traj)
+        np.testing.assert_equal(m.to_state_probability_trajectory(obs_traj, out=out), prob_traj)
+        np.testing.assert_equal(out, prob_traj)
+        with self.assertRaises(ValueError):
+            m.to_state_probability_trajectory(obs_traj, out=np.empty((len(obs_traj) - 1, 4)))
+        with self.assertRaises(ValueError):
+            m.to_state_probability_trajectory(obs_traj, out=np.empty((len(obs_traj), 4), dtype=np.float32))
+
     def test_sample(self):
         output_probabilities = np.array([
             [0.8, 0.1, 0.1],
@@ -133,6 +141,13 @@ class TestGaussian(unittest.TestCase):
             stateprobs = m.to_state_probability_trajectory(np.random.normal(loc=mean, scale=1e-4, size=(1000,)))
             np.testing.assert_equal(np.argmax(stateprobs, axis=-1), state)
 
+    def test_output_probability_trajectory_out(self):
+        m = GaussianOutputModel(3, means=np.array([-1., 0., 1.]), sigmas=np.array([.5, .2, .1]))
+        obs = np.random.normal(size=(100,))
+        out = np.empty((100, 3))
+        m.to_state_probability_trajectory(obs, out=out)
+        np.testing.assert_array_almost_equal(out, m.to_state_probability_trajectory(obs))
+
     def test_sample(self):
         m = GaussianOutputModel(3)
         means = np.array([-1., 1., 3.])
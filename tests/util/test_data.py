@@ -58,6 +58,17 @@ def test_timeshifted_split_nolag():
         np.testing.assert_(len(splits[i]) > 0)
 
 
+@pytest.mark.parametrize('n_splits', [None, 3], ids=lambda x: f"n_splits={x}")
+def test_timeshifted_split_blocks_alias_input(n_splits):
+    x = np.arange(100)
+    for X, Y in timeshifted_split(x, lagtime=1, chunksize=7, n_splits=n_splits):
+        np.testing.assert_(np.shares_memory(X, x))
+        np.testing.assert_(np.shares_memory(Y, x))
+    for X, Y in timeshifted_split(x, lagtime=1, chunksize=7, n_splits=n_splits, shuffle=True):
+        np.testing.assert_(not np.shares_memory(X, x))
+        np.testing.assert_(not np.shares_memory(Y, x))
+
+
 @pytest.mark.parametrize('lagtime', [0, 5], ids=lambda x: f"lagtime={x}")
 @pytest.mark.parametrize('n_splits', [3, 7, 23], ids=lambda x: f"n_splits={x}")
 def test_timeshifted_split_shuffle(lagtime, n_splits):
@@ -106,7 +117,7 @@ def test_timelagged_dataset(lagtime):
 @pytest.mark.parametrize("lagtime", [1, 5], ids=lambda x: f"lag={x}")
 @pytest.mark.parametrize("ntraj", [1, 2, 3], ids=lambda x: f"ntraj={x}")
 @pytest.mark.parametrize("stride", [None, 1, 2, 3], ids=lambda x: f"stride={x}")
-@pytest.mark.parametrize("start", [None, 0, 1], ids=lambda x: f"start={x}")
+@pytest.mark.parametrize("start", [None, 0, 1, -20], ids=lambda x: f"start={x}")
 @pytest.mark.parametrize("stop", [None, 50], ids=lambda x: f"stop={x}")
 def test_timelagged_dataset_multitraj(lagtime, ntraj, stride, start, stop):
     data = [np.random.normal(size=(7, 3)), np.random.normal(size=(555, 3)), np.random.normal(size=(55, 3))]